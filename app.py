@@ -1,13 +1,19 @@
-import pandas as pd
 import xml.etree.ElementTree as ET
+import io
+import itertools
+import multiprocessing
 import os
 import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
-from flask import Flask, request, render_template, send_file, flash, redirect, url_for, session
-from werkzeug.utils import secure_filename
+from flask import Flask, request, render_template, send_file, flash, redirect, url_for, session, jsonify, Response
 import tempfile
 import shutil
+import threading
 import time
+import uuid
+from collections import OrderedDict
 
 app = Flask(__name__)
 app.secret_key = 'sua_chave_secreta_aqui'  # Altere para uma chave segura
@@ -18,9 +24,52 @@ app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 DOWNLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'downloads')
 app.config['DOWNLOAD_FOLDER'] = DOWNLOAD_FOLDER
 
-# Criar pasta de downloads se não existir
-if not os.path.exists(DOWNLOAD_FOLDER):
-    os.makedirs(DOWNLOAD_FOLDER)
+# Trabalhos processados gravados em disco: o link de download continua valendo
+# depois de um reinício ou de o trabalho sair do cache em memória
+TRABALHOS_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'trabalhos')
+app.config['TRABALHOS_FOLDER'] = TRABALHOS_FOLDER
+
+# Área temporária de cada trabalho (ex.: GERADOR_TMPDIR=/dev/shm para usar tmpfs; padrão: temporário do sistema)
+app.config['WORKSPACE_FOLDER'] = os.environ.get('GERADOR_TMPDIR') or None
+
+# Criar pastas de downloads e de trabalhos se não existirem
+for pasta in (DOWNLOAD_FOLDER, TRABALHOS_FOLDER):
+    if not os.path.exists(pasta):
+        os.makedirs(pasta)
+
+# Workers pré-aquecidos que executam a leitura e a geração do ZIP (0 = na própria requisição)
+app.config['WORKERS'] = int(os.environ.get('GERADOR_WORKERS', min(4, os.cpu_count() or 1)))
+# Cada worker é substituído após esse número de tarefas, limitando o crescimento de memória
+# (o envio é uma tarefa e a geração do ZIP no download é outra)
+app.config['TAREFAS_POR_WORKER'] = int(os.environ.get('GERADOR_TAREFAS_POR_WORKER', 100))
+pool_workers = None
+trava_pool = threading.Lock()
+
+# Cache em memória dos trabalhos (pré-visualização e ZIP em fluxo), do menos para o mais usado,
+# limitado pelo tamanho dos dados; o que sai do cache é lido de novo da pasta de trabalhos
+TRABALHOS = OrderedDict()
+MEMORIA_TRABALHOS = int(os.environ.get('GERADOR_MEMORIA_TRABALHOS_MB', 256)) * 1024 * 1024
+TRAVAS_TRABALHOS = {}  # Uma trava por trabalho: o mesmo ZIP não é gerado duas vezes ao mesmo tempo
+TEMPO_TRABALHO = 3600  # Mesmo prazo da limpeza de downloads
+TAMANHO_BLOCO_FLUXO = 64 * 1024  # Bytes acumulados antes de enviar um pedaço do ZIP em fluxo
+REGISTROS_POR_PAGINA = 10
+MAX_REGISTROS_POR_PAGINA = 100
+trava_trabalhos = threading.Lock()
+
+# Colunas usadas sem valor padrão em criar_xml_edificio
+COLUNAS_OBRIGATORIAS = ['COD_SURVEY', 'LATITUDE', 'LONGITUDE', 'LOGRADOURO', 'BAIRRO',
+                        'MUNICIPIO', 'LOCALIDADE', 'UF', 'COD_LOGRADOURO']
+COLUNAS_TEXTO_OBRIGATORIO = ['COD_SURVEY', 'LOGRADOURO', 'BAIRRO', 'MUNICIPIO', 'LOCALIDADE', 'UF']
+
+# Registro usado apenas para aquecer os workers
+CSV_AQUECIMENTO = (
+    'ESTACAO_ABASTECEDORA;UF;MUNICIPIO;LOCALIDADE;LOGRADOURO;COD_LOGRADOURO;NUM_FACHADA;'
+    'COMPLEMENTO;COMPLEMENTO2;CEP;BAIRRO;COD_SURVEY;QUANTIDADE_UMS;ID_ENDERECO;LATITUDE;'
+    'LONGITUDE;ID_ROTEIRO;ID_LOCALIDADE;RESULTADO;COD_ZONA\n'
+    'ACG;GO;APARECIDA DE GOIANIA;APARECIDA DE GOIANIA;AVENIDA SANTANA;2600341690;SN;'
+    'QU 4;LT 73;74987375;JARDIM REPOUSO;H373158;1;37576190;-16,8282333;'
+    '-49,2303061;75545621;1891601;SL1;GO-GNA-ACG-CEOS-111\n'
+)
 
 # Dicionário de mapeamento de códigos de complemento
 CODIGOS_COMPLEMENTO = {
@@ -43,9 +92,19 @@ CODIGOS_COMPLEMENTO = {
     "AM": 121, "NR": 122, "CH": 124
 }
 
+def _isna(valor):
+    """Equivale a pd.isna para um valor escalar (None, NaN, NaT, pd.NA) sem importar o pandas a cada registro"""
+    if valor is None:
+        return True
+    try:
+        return bool(valor != valor)
+    except TypeError:
+        # pd.NA não pode ser convertido para bool
+        return True
+
 def formatar_coordenada(coord):
     """Converte coordenada de formato brasileiro para internacional"""
-    if pd.isna(coord):
+    if _isna(coord):
         return None
     try:
         return float(str(coord).replace(',', '.'))
@@ -56,7 +115,7 @@ def obter_codigo_complemento(texto):
     """
     Obtém o código do complemento baseado nas duas primeiras letras do texto
     """
-    if pd.isna(texto) or texto == '':
+    if _isna(texto) or texto == '':
         return '60'  # Default para LT (LOTE)
     
     texto_str = str(texto).strip().upper()
@@ -72,7 +131,7 @@ def extrair_numero_argumento(texto):
     """
     Extrai TODO o conteúdo depois das duas primeiras letras
     """
-    if pd.isna(texto) or texto == '':
+    if _isna(texto) or texto == '':
         return '1'
     
     texto_str = str(texto).strip()
@@ -110,20 +169,20 @@ def criar_xml_edificio(dados_csv, numero_pasta):
     ET.SubElement(edificio, 'coordX').text = str(longitude) 
     ET.SubElement(edificio, 'coordY').text = str(latitude) 
     
-    codigo_zona = str(dados_csv['COD_ZONA']) if 'COD_ZONA' in dados_csv and not pd.isna(dados_csv['COD_ZONA']) else 'DF-GURX-ETGR-CEOS-68'
+    codigo_zona = str(dados_csv['COD_ZONA']) if 'COD_ZONA' in dados_csv and not _isna(dados_csv['COD_ZONA']) else 'DF-GURX-ETGR-CEOS-68'
     ET.SubElement(edificio, 'codigoZona').text = codigo_zona
     ET.SubElement(edificio, 'nomeZona').text = codigo_zona
     
-    localidade = str(dados_csv['LOCALIDADE']) if 'LOCALIDADE' in dados_csv and not pd.isna(dados_csv['LOCALIDADE']) else 'GUARA'
+    localidade = str(dados_csv['LOCALIDADE']) if 'LOCALIDADE' in dados_csv and not _isna(dados_csv['LOCALIDADE']) else 'GUARA'
     ET.SubElement(edificio, 'localidade').text = localidade
     
     endereco = ET.SubElement(edificio, 'enderecoEdificio')
-    ET.SubElement(endereco, 'id').text = str(dados_csv['ID_ENDERECO']) if 'ID_ENDERECO' in dados_csv and not pd.isna(dados_csv['ID_ENDERECO']) else '93128133'
+    ET.SubElement(endereco, 'id').text = str(dados_csv['ID_ENDERECO']) if 'ID_ENDERECO' in dados_csv and not _isna(dados_csv['ID_ENDERECO']) else '93128133'
     
     logradouro = str(dados_csv['LOGRADOURO'] +", "+ dados_csv['BAIRRO']+", "+dados_csv['MUNICIPIO']+", "+dados_csv['LOCALIDADE']+" - "+ dados_csv["UF"]+ f" ({dados_csv['COD_LOGRADOURO']})" )
     ET.SubElement(endereco, 'logradouro').text = logradouro
     
-    num_fachada = str(dados_csv['NUM_FACHADA']) if 'NUM_FACHADA' in dados_csv and not pd.isna(dados_csv['NUM_FACHADA']) else 'SN'
+    num_fachada = str(dados_csv['NUM_FACHADA']) if 'NUM_FACHADA' in dados_csv and not _isna(dados_csv['NUM_FACHADA']) else 'SN'
     ET.SubElement(endereco, 'numero_fachada').text = num_fachada
     
     complemento1 = dados_csv['COMPLEMENTO'] if 'COMPLEMENTO' in dados_csv else ''
@@ -147,16 +206,16 @@ def criar_xml_edificio(dados_csv, numero_pasta):
     ET.SubElement(endereco, 'id_complemento3').text = codigo_complemento3
     ET.SubElement(endereco, 'argumento3').text = argumento3
     
-    cep = str(dados_csv['CEP']) if 'CEP' in dados_csv and not pd.isna(dados_csv['CEP']) else '71065071'
+    cep = str(dados_csv['CEP']) if 'CEP' in dados_csv and not _isna(dados_csv['CEP']) else '71065071'
     ET.SubElement(endereco, 'cep').text = cep
     
-    bairro = str(dados_csv['BAIRRO']) if 'BAIRRO' in dados_csv and not pd.isna(dados_csv['BAIRRO']) else localidade
+    bairro = str(dados_csv['BAIRRO']) if 'BAIRRO' in dados_csv and not _isna(dados_csv['BAIRRO']) else localidade
     ET.SubElement(endereco, 'bairro').text = bairro
     
-    ET.SubElement(endereco, 'id_roteiro').text = str(dados_csv['ID_ROTEIRO']) if 'ID_ROTEIRO' in dados_csv and not pd.isna(dados_csv['ID_ROTEIRO']) else '57149008'
-    ET.SubElement(endereco, 'id_localidade').text = str(dados_csv['ID_LOCALIDADE']) if 'ID_LOCALIDADE' in dados_csv and not pd.isna(dados_csv['ID_LOCALIDADE']) else '1894644'
+    ET.SubElement(endereco, 'id_roteiro').text = str(dados_csv['ID_ROTEIRO']) if 'ID_ROTEIRO' in dados_csv and not _isna(dados_csv['ID_ROTEIRO']) else '57149008'
+    ET.SubElement(endereco, 'id_localidade').text = str(dados_csv['ID_LOCALIDADE']) if 'ID_LOCALIDADE' in dados_csv and not _isna(dados_csv['ID_LOCALIDADE']) else '1894644'
     
-    cod_lograd = str(dados_csv['COD_LOGRADOURO']) if 'COD_LOGRADOURO' in dados_csv and not pd.isna(dados_csv['COD_LOGRADOURO']) else '2700035341'
+    cod_lograd = str(dados_csv['COD_LOGRADOURO']) if 'COD_LOGRADOURO' in dados_csv and not _isna(dados_csv['COD_LOGRADOURO']) else '2700035341'
     ET.SubElement(endereco, 'cod_lograd').text = cod_lograd
     
     tecnico = ET.SubElement(edificio, 'tecnico')
@@ -170,11 +229,11 @@ def criar_xml_edificio(dados_csv, numero_pasta):
     data_atual = datetime.now().strftime('%Y%m%d%H%M%S')
     ET.SubElement(edificio, 'data').text = data_atual
     
-    total_ucs = int(dados_csv['QUANTIDADE_UMS']) if 'QUANTIDADE_UMS' in dados_csv and not pd.isna(dados_csv['QUANTIDADE_UMS']) else 1
+    total_ucs = int(dados_csv['QUANTIDADE_UMS']) if 'QUANTIDADE_UMS' in dados_csv and not _isna(dados_csv['QUANTIDADE_UMS']) else 1
     ET.SubElement(edificio, 'totalUCs').text = str(total_ucs)
     
     # DETERMINAR OCUPAÇÃO COM BASE NO RESULTADO
-    resultado = str(dados_csv['RESULTADO']).strip().upper() if 'RESULTADO' in dados_csv and not pd.isna(dados_csv['RESULTADO']) else ''
+    resultado = str(dados_csv['RESULTADO']).strip().upper() if 'RESULTADO' in dados_csv and not _isna(dados_csv['RESULTADO']) else ''
     
     # OCUPAÇÃO FIXA (não muda)
     ET.SubElement(edificio, 'ocupacao').text = "EDIFICACAOCOMPLETA"
@@ -193,7 +252,44 @@ def criar_xml_edificio(dados_csv, numero_pasta):
     
     return xml_completo
 
-def processar_csv(arquivo_path):
+def iterar_linhas_xlsx(arquivo_path):
+    """
+    Lê a primeira aba do .xlsx linha a linha (modo somente leitura do openpyxl),
+    sem carregar a planilha inteira. Cada linha vira um dicionário coluna → valor.
+    """
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise Exception("Para ler arquivos .xlsx instale o openpyxl (pip install openpyxl)")
+    
+    planilha = load_workbook(arquivo_path, read_only=True, data_only=True)
+    try:
+        linhas = planilha.active.iter_rows(values_only=True)
+        cabecalho = next(linhas, None)
+        if cabecalho is None:
+            return
+        colunas = [str(coluna).strip() if coluna is not None else '' for coluna in cabecalho]
+        
+        for valores in linhas:
+            # Linhas totalmente vazias (formatação no fim da planilha) são ignoradas
+            if all(valor is None for valor in valores):
+                continue
+            yield dict(zip(colunas, valores))
+    finally:
+        planilha.close()
+
+def ler_csv(arquivo_path):
+    # pandas só é importado no primeiro processamento para não pesar na inicialização
+    import pandas as pd
+    
+    if arquivo_path.lower().endswith('.xlsx'):
+        try:
+            # dtype=object mantém os int do openpyxl: com uma célula vazia o pandas
+            # converteria a coluna para float e os IDs sairiam como "37576190.0"
+            return pd.DataFrame(list(iterar_linhas_xlsx(arquivo_path)), dtype=object)
+        except Exception as e:
+            raise Exception(f"Erro ao ler o arquivo XLSX: {e}")
+    
     try:
         encodings = ['utf-8', 'latin-1', 'iso-8859-1', 'cp1252']
         
@@ -210,75 +306,386 @@ def processar_csv(arquivo_path):
     except Exception as e:
         raise Exception(f"Erro ao ler o arquivo CSV: {e}")
     
-    if len(df) == 0:
-        raise Exception("O arquivo CSV está vazio")
-    
-    # Criar diretório principal
-    estacao = df['ESTACAO_ABASTECEDORA'].iloc[0] if 'ESTACAO_ABASTECEDORA' in df.columns else 'DESCONHECIDA'
-    diretorio_principal = f'moradias_xml_{estacao}_{datetime.now().strftime("%Y%m%d%H%M%S")}'
-    os.makedirs(diretorio_principal, exist_ok=True)
-    
-    pastas_criadas = []
+    return df
+
+def gerar_log(df):
+    """Monta o log de amostragem (registro 1 e a cada 10 registros) sem gerar os XMLs"""
     log_processamento = []
     
-    for i, (index, linha) in enumerate(df.iterrows(), 1):
-        nome_pasta = f'moradia{i}'
-        caminho_pasta = os.path.join(diretorio_principal, nome_pasta)
-        os.makedirs(caminho_pasta, exist_ok=True)
-        pastas_criadas.append(caminho_pasta)
+    for i in [1] + list(range(10, len(df) + 1, 10)):
+        linha = df.iloc[i - 1]
         
         comp1 = linha['COMPLEMENTO'] if 'COMPLEMENTO' in linha else ''
         comp2 = linha['COMPLEMENTO2'] if 'COMPLEMENTO2' in linha else ''
         resultado = linha['RESULTADO'] if 'RESULTADO' in linha else ''
         
-        xml_content = criar_xml_edificio(linha, i)
-        caminho_xml = os.path.join(caminho_pasta, f'{nome_pasta}.xml')
+        codigo1 = obter_codigo_complemento(comp1)
+        codigo2 = obter_codigo_complemento(comp2)
+        codigo3 = obter_codigo_complemento(resultado)
+        
+        arg1 = extrair_numero_argumento(comp1)
+        arg2 = extrair_numero_argumento(comp2)
+        arg3 = extrair_numero_argumento(resultado)
+        
+        log_processamento.append(f'Registro {i}:')
+        log_processamento.append(f'  COMP1("{comp1}" → código:{codigo1} argumento:"{arg1}")')
+        log_processamento.append(f'  COMP2("{comp2}" → código:{codigo2} argumento:"{arg2}")')
+        log_processamento.append(f'  RESULT("{resultado}" → código:{codigo3} argumento:"{arg3}")')
+        log_processamento.append('-' * 50)
+    
+    return '\n'.join(log_processamento)
+
+def caminho_trabalho(nome_trabalho):
+    return os.path.join(app.config['TRABALHOS_FOLDER'], f'{nome_trabalho}.pkl')
+
+def guardar_em_memoria(nome_trabalho, df):
+    """Coloca o trabalho no cache e descarta os menos usados até caber no limite de memória"""
+    tamanho = int(df.memory_usage(deep=True).sum())
+    with trava_trabalhos:
+        TRABALHOS.pop(nome_trabalho, None)
+        TRABALHOS[nome_trabalho] = {'df': df, 'tamanho': tamanho}
         
-        with open(caminho_xml, 'wb') as f:
-            f.write(xml_content)
+        # O trabalho recém-usado fica mesmo que sozinho passe do limite
+        em_uso = sum(trabalho['tamanho'] for trabalho in TRABALHOS.values())
+        while em_uso > MEMORIA_TRABALHOS and len(TRABALHOS) > 1:
+            nome_antigo, antigo = TRABALHOS.popitem(last=False)
+            em_uso -= antigo['tamanho']
+
+def descartar_da_memoria(nome_trabalho):
+    with trava_trabalhos:
+        TRABALHOS.pop(nome_trabalho, None)
+
+def localizar_trabalho(nome_trabalho):
+    """Retorna o caminho dos dados gravados do trabalho ou None se ele não existir ou tiver expirado"""
+    caminho = caminho_trabalho(nome_trabalho)
+    try:
+        expirado = time.time() - os.path.getmtime(caminho) > TEMPO_TRABALHO
+    except OSError:
+        descartar_da_memoria(nome_trabalho)
+        return None
+    
+    if expirado:
+        descartar_da_memoria(nome_trabalho)
+        try:
+            os.remove(caminho)
+        except OSError:
+            pass
+        return None
+    
+    return caminho
+
+def obter_trabalho(nome_trabalho):
+    """Retorna os dados do trabalho (do cache ou do disco) ou None se ele não existir ou tiver expirado"""
+    caminho = localizar_trabalho(nome_trabalho)
+    if caminho is None:
+        return None
+    
+    with trava_trabalhos:
+        trabalho = TRABALHOS.get(nome_trabalho)
+        if trabalho is not None:
+            TRABALHOS.move_to_end(nome_trabalho)
+            return trabalho['df']
+    
+    import pandas as pd
+    df = pd.read_pickle(caminho)
+    guardar_em_memoria(nome_trabalho, df)
+    return df
+
+def trava_do_trabalho(nome_trabalho):
+    with trava_trabalhos:
+        return TRAVAS_TRABALHOS.setdefault(nome_trabalho, threading.Lock())
+
+def validar_registros(df):
+    """
+    Confere no envio o que criar_xml_edificio exige de cada registro, para que o
+    erro apareça no upload e não no download ou na pré-visualização
+    """
+    faltando = [coluna for coluna in COLUNAS_OBRIGATORIAS if coluna not in df.columns]
+    if faltando:
+        raise Exception(f"Colunas obrigatórias ausentes: {', '.join(faltando)}")
+    
+    problemas = []
+    
+    # Campos concatenados no logradouro (e o COD_SURVEY) precisam ser texto preenchido
+    for coluna in COLUNAS_TEXTO_OBRIGATORIO:
+        invalidos = (~df[coluna].map(lambda valor: isinstance(valor, str) and valor.strip() != '')).to_numpy().nonzero()[0] + 1
+        if len(invalidos):
+            problemas.append(f'{coluna} vazio ou inválido (registros {formatar_numeros(invalidos)})')
+    
+    # Mesma conversão de criar_xml_edificio: int() recusa textos como '2.0' que to_numeric aceitaria
+    if 'QUANTIDADE_UMS' in df.columns:
+        invalidos = (~df['QUANTIDADE_UMS'].map(aceita_inteiro)).to_numpy().nonzero()[0] + 1
+        if len(invalidos):
+            problemas.append(f'QUANTIDADE_UMS não é um número inteiro (registros {formatar_numeros(invalidos)})')
+    
+    if problemas:
+        raise Exception('Registros inválidos: ' + '; '.join(problemas))
+
+def aceita_inteiro(valor):
+    """Vazio (vira o padrão) ou convertível por int(), como espera criar_xml_edificio"""
+    if _isna(valor):
+        return True
+    try:
+        int(valor)
+    except (TypeError, ValueError, OverflowError):
+        return False
+    return True
+
+def formatar_numeros(numeros, limite=10):
+    """Lista os primeiros números de registro de um problema, indicando quantos faltaram"""
+    texto = ', '.join(str(numero) for numero in numeros[:limite])
+    if len(numeros) > limite:
+        texto += f' e mais {len(numeros) - limite}'
+    return texto
+
+def ler_e_resumir(arquivo_path, pasta_trabalhos):
+    """
+    Lê e valida o arquivo, grava os dados na pasta de trabalhos e monta o log de amostragem.
+    Executado nos workers: só o nome do trabalho, o total e o log voltam ao servidor.
+    """
+    df = ler_csv(arquivo_path)
+    
+    if len(df) == 0:
+        raise Exception("O arquivo está vazio")
+    
+    validar_registros(df)
+    log = gerar_log(df)
+    
+    # O ZIP só é montado quando alguém pede o download (ver construir_zip)
+    estacao = df['ESTACAO_ABASTECEDORA'].iloc[0] if 'ESTACAO_ABASTECEDORA' in df.columns else 'DESCONHECIDA'
+    # Sufixo aleatório: dois envios da mesma estação no mesmo segundo não podem colidir
+    diretorio_principal = f'moradias_xml_{estacao}_{datetime.now().strftime("%Y%m%d%H%M%S")}_{uuid.uuid4().hex[:8]}'
+    df.to_pickle(os.path.join(pasta_trabalhos, f'{diretorio_principal}.pkl'))
+    
+    return diretorio_principal, len(df), log
+
+def processar_csv(arquivo_path, usar_workers=True):
+    # As pastas vão como argumento: com spawn (Windows/macOS) o worker não enxerga app.config do servidor
+    argumentos = (arquivo_path, app.config['TRABALHOS_FOLDER'])
+    if usar_workers:
+        diretorio_principal, total_registros, log = executar_no_worker(ler_e_resumir, *argumentos)
+    else:
+        diretorio_principal, total_registros, log = ler_e_resumir(*argumentos)
+    
+    # Retornar apenas o nome do arquivo, não o caminho completo
+    return f'{diretorio_principal}.zip', total_registros, log
+
+def construir_zip(diretorio_principal, caminho_dados, pasta_downloads, pasta_area=None):
+    """
+    Gera os XMLs de todos os registros e salva o ZIP na pasta de downloads.
+    Executado nos workers, que leem os dados gravados no envio em vez de recebê-los do servidor.
+    Cada trabalho usa sua própria área temporária, removida ao final mesmo em caso de erro.
+    """
+    import pandas as pd
+    
+    df = pd.read_pickle(caminho_dados)
+    area_trabalho = tempfile.mkdtemp(prefix=f'{diretorio_principal}_', dir=pasta_area)
+    zip_filename = os.path.join(pasta_downloads, f'{diretorio_principal}.zip')
+    zip_provisorio = None
+    
+    try:
+        pastas_criadas = []
         
-        if i % 10 == 0 or i == 1:
-            codigo1 = obter_codigo_complemento(comp1)
-            codigo2 = obter_codigo_complemento(comp2)
-            codigo3 = obter_codigo_complemento(resultado)
+        for i, (index, linha) in enumerate(df.iterrows(), 1):
+            nome_pasta = f'moradia{i}'
+            caminho_pasta = os.path.join(area_trabalho, nome_pasta)
+            os.makedirs(caminho_pasta)
+            pastas_criadas.append(caminho_pasta)
             
-            arg1 = extrair_numero_argumento(comp1)
-            arg2 = extrair_numero_argumento(comp2)
-            arg3 = extrair_numero_argumento(resultado)
+            xml_content = criar_xml_edificio(linha, i)
+            caminho_xml = os.path.join(caminho_pasta, f'{nome_pasta}.xml')
             
-            log_processamento.append(f'Registro {i}:')
-            log_processamento.append(f'  COMP1("{comp1}" → código:{codigo1} argumento:"{arg1}")')
-            log_processamento.append(f'  COMP2("{comp2}" → código:{codigo2} argumento:"{arg2}")')
-            log_processamento.append(f'  RESULT("{resultado}" → código:{codigo3} argumento:"{arg3}")')
-            log_processamento.append('-' * 50)
-    
-    # Salvar o ZIP na pasta de downloads
-    zip_filename = os.path.join(app.config['DOWNLOAD_FOLDER'], f'{diretorio_principal}.zip')
-    
-    with zipfile.ZipFile(zip_filename, 'w', zipfile.ZIP_DEFLATED) as zipf:
-        for pasta in pastas_criadas:
-            for root, dirs, files in os.walk(pasta):
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    arcname = os.path.relpath(file_path, diretorio_principal)
-                    zipf.write(file_path, arcname)
-    
-    # Limpar pastas temporárias
-    shutil.rmtree(diretorio_principal)
+            with open(caminho_xml, 'wb') as f:
+                f.write(xml_content)
+        
+        # Salvar o ZIP na pasta de downloads (nome provisório exclusivo até ficar completo)
+        fd, zip_provisorio = tempfile.mkstemp(prefix=f'.{diretorio_principal}_', suffix='.tmp',
+                                              dir=pasta_downloads)
+        
+        with os.fdopen(fd, 'wb') as arquivo_zip, zipfile.ZipFile(arquivo_zip, 'w', zipfile.ZIP_DEFLATED) as zipf:
+            for pasta in pastas_criadas:
+                for root, dirs, files in os.walk(pasta):
+                    for file in files:
+                        file_path = os.path.join(root, file)
+                        arcname = os.path.relpath(file_path, area_trabalho)
+                        zipf.write(file_path, arcname)
+        
+        os.replace(zip_provisorio, zip_filename)
+        zip_provisorio = None
+    finally:
+        # Limpar a área temporária (e o ZIP provisório, se algo falhou no meio)
+        shutil.rmtree(area_trabalho, ignore_errors=True)
+        if zip_provisorio is not None and os.path.exists(zip_provisorio):
+            os.remove(zip_provisorio)
     
-    # Retornar apenas o nome do arquivo, não o caminho completo
-    return os.path.basename(zip_filename), len(df), '\n'.join(log_processamento)
+    return zip_filename
+
+class SaidaFluxoZip(io.RawIOBase):
+    """Destino não pesquisável para o ZipFile: acumula os bytes até serem coletados"""
+    
+    def __init__(self):
+        super().__init__()
+        self._partes = []
+        self.tamanho = 0
+    
+    def writable(self):
+        return True
+    
+    def write(self, dados):
+        self._partes.append(bytes(dados))
+        self.tamanho += len(dados)
+        return len(dados)
+    
+    def coletar(self):
+        dados = b''.join(self._partes)
+        self._partes = []
+        self.tamanho = 0
+        return dados
+
+def gerar_zip_em_fluxo(df):
+    """
+    Gera o ZIP enquanto ele é enviado, sem gravar nada em disco.
+    Cada XML é comprimido assim que é gerado; só o diretório central do ZIP
+    (alguns bytes por arquivo) fica em memória até o final.
+    """
+    saida = SaidaFluxoZip()
+    
+    with zipfile.ZipFile(saida, 'w', zipfile.ZIP_DEFLATED) as zipf:
+        for i, (index, linha) in enumerate(df.iterrows(), 1):
+            nome_pasta = f'moradia{i}'
+            zipf.writestr(f'{nome_pasta}/{nome_pasta}.xml', criar_xml_edificio(linha, i))
+            
+            if saida.tamanho >= TAMANHO_BLOCO_FLUXO:
+                yield saida.coletar()
+    
+    # Restante dos dados e diretório central gravados no fechamento do ZIP
+    yield saida.coletar()
+
+def perfilar_trabalho(arquivo_path, pasta_trabalhos, pasta_downloads, pasta_area=None):
+    """
+    Executa o trabalho completo (leitura, XMLs e ZIP) sob o perfilador e grava
+    o perfil ao lado do ZIP, na pasta de downloads. Roda em um worker, que só executa
+    uma tarefa por vez: no Python 3.12+ o cProfile registra todas as threads do processo,
+    e no servidor o perfil misturaria pré-visualizações e downloads de outras requisições.
+    """
+    from perfil import Perfilador
+    
+    with Perfilador() as perfilador:
+        nome_trabalho, total_registros, log = ler_e_resumir(arquivo_path, pasta_trabalhos)
+        construir_zip(nome_trabalho, os.path.join(pasta_trabalhos, f'{nome_trabalho}.pkl'),
+                      pasta_downloads, pasta_area)
+    
+    arquivos_perfil = perfilador.salvar(os.path.join(pasta_downloads, nome_trabalho))
+    return nome_trabalho, total_registros, log, [os.path.basename(caminho) for caminho in arquivos_perfil]
+
+def processar_csv_com_perfil(arquivo_path):
+    # Sem workers (GERADOR_WORKERS=0) o perfil roda na thread da requisição e, no 3.12+, inclui as demais
+    nome_trabalho, total_registros, log, arquivos_perfil = executar_no_worker(
+        perfilar_trabalho, arquivo_path, app.config['TRABALHOS_FOLDER'],
+        app.config['DOWNLOAD_FOLDER'], app.config['WORKSPACE_FOLDER'])
+    return f'{nome_trabalho}.zip', total_registros, log, arquivos_perfil
+
+def renderizar_registros(df, numeros):
+    """Gera o XML apenas dos registros pedidos (numeração a partir de 1, como as pastas moradiaN)"""
+    registros = []
+    
+    for i in numeros:
+        linha = df.iloc[i - 1]
+        registros.append({
+            'registro': int(i),
+            'arquivo': f'moradia{i}/moradia{i}.xml',
+            'cod_survey': str(linha['COD_SURVEY']) if 'COD_SURVEY' in linha else '',
+            'xml': criar_xml_edificio(linha, i).decode('utf-8'),
+        })
+    
+    return registros
+
+def aquecer_worker():
+    """
+    Inicialização de cada worker: importa os módulos pesados e executa uma vez
+    cada etapa da geração, para que o primeiro trabalho não pague esse custo
+    """
+    import pandas as pd
+    
+    df = pd.read_csv(io.StringIO(CSV_AQUECIMENTO), sep=';')
+    for i, (index, linha) in enumerate(df.iterrows(), 1):
+        criar_xml_edificio(linha, i)
+    gerar_log(df)
+    
+    for sigla in CODIGOS_COMPLEMENTO:
+        obter_codigo_complemento(f'{sigla} 1')
+        extrair_numero_argumento(f'{sigla} 1')
+    
+    with zipfile.ZipFile(io.BytesIO(), 'w', zipfile.ZIP_DEFLATED) as zipf:
+        zipf.writestr('aquecimento.xml', b'<aquecimento/>')
+
+def criar_pool():
+    """
+    Cria o executor dos workers. Eles nascem do forkserver (ou por spawn, onde não há
+    forkserver) e nunca de um fork do servidor: o processo do Flask tem várias threads,
+    e um fork dele (inclusive ao repor um worker reciclado) pode travar
+    """
+    metodo = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    pool = ProcessPoolExecutor(
+        max_workers=app.config['WORKERS'],
+        mp_context=multiprocessing.get_context(metodo),
+        initializer=aquecer_worker,
+        max_tasks_per_child=app.config['TAREFAS_POR_WORKER'] or None
+    )
+    
+    # O executor só cria processos quando recebe tarefas: uma tarefa vazia por worker
+    # faz todos subirem (e se aquecerem) já na inicialização
+    for _ in range(app.config['WORKERS']):
+        pool.submit(os.getpid)
+    
+    return pool
+
+def iniciar_workers():
+    """Cria o pool de workers na inicialização do servidor (processos já iniciados e aquecidos)"""
+    global pool_workers
+    
+    if app.config['WORKERS'] > 0 and pool_workers is None:
+        pool_workers = criar_pool()
+        print(f"{app.config['WORKERS']} workers iniciados "
+              f"(reciclados a cada {app.config['TAREFAS_POR_WORKER']} tarefas)")
+    
+    # O processo do servidor também usa pandas (pré-visualização e ZIP em fluxo);
+    # aquece em segundo plano para não atrasar a inicialização
+    threading.Thread(target=aquecer_worker, daemon=True).start()
+    
+    return pool_workers
+
+def executar_no_worker(funcao, *args):
+    """Executa a função em um worker do pool, ou na própria thread se o pool não foi iniciado"""
+    global pool_workers
+    
+    pool = pool_workers
+    if pool is None:
+        return funcao(*args)
+    
+    try:
+        return pool.submit(funcao, *args).result()
+    except BrokenProcessPool:
+        # Um worker morreu no meio de uma tarefa (ex.: falta de memória): o executor não
+        # aceita mais tarefas, então um pool novo atende as próximas requisições
+        with trava_pool:
+            if pool_workers is pool:
+                pool_workers = criar_pool()
+        pool.shutdown(wait=False)
+        raise Exception("O processo de trabalho foi encerrado inesperadamente "
+                        "(memória insuficiente?). Envie o arquivo novamente.")
 
 def limpar_arquivos_antigos():
-    """Limpa arquivos com mais de 1 hora na pasta de downloads"""
+    """Limpa arquivos com mais de 1 hora nas pastas de downloads e de trabalhos"""
     try:
         agora = time.time()
-        for filename in os.listdir(app.config['DOWNLOAD_FOLDER']):
-            file_path = os.path.join(app.config['DOWNLOAD_FOLDER'], filename)
-            if os.path.isfile(file_path):
-                # Verificar se o arquivo tem mais de 1 hora
-                if agora - os.path.getctime(file_path) > 3600:
-                    os.remove(file_path)
+        for pasta in (app.config['DOWNLOAD_FOLDER'], app.config['TRABALHOS_FOLDER']):
+            for filename in os.listdir(pasta):
+                file_path = os.path.join(pasta, filename)
+                if os.path.isfile(file_path):
+                    # Verificar se o arquivo tem mais de 1 hora
+                    if agora - os.path.getctime(file_path) > 3600:
+                        os.remove(file_path)
     except Exception as e:
         print(f"Erro ao limpar arquivos antigos: {e}")
 
@@ -294,19 +701,32 @@ def index():
             flash('Nenhum arquivo selecionado')
             return redirect(request.url)
         
-        if file and file.filename.endswith('.csv'):
-            filename = secure_filename(file.filename)
-            filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+        if file and file.filename.lower().endswith(('.csv', '.xlsx')):
+            # Nome exclusivo: envios simultâneos com o mesmo nome não se sobrescrevem
+            # A extensão vem do nome original, já conferido acima (secure_filename pode descartar
+            # o ponto: 'планы.xlsx' → 'xlsx', e o XLSX seria lido como CSV)
+            extensao = '.xlsx' if file.filename.lower().endswith('.xlsx') else '.csv'
+            fd, filepath = tempfile.mkstemp(prefix='upload_', suffix=extensao,
+                                            dir=app.config['UPLOAD_FOLDER'])
+            os.close(fd)
             file.save(filepath)
             
+            # Perfil opcional do trabalho (campo "perfil" do formulário ou ?perfil=1)
+            perfil_ativo = request.form.get('perfil') == '1' or request.args.get('perfil') == '1'
+            arquivos_perfil = []
+            
             try:
-                zip_filename, total_registros, log = processar_csv(filepath)
+                if perfil_ativo:
+                    zip_filename, total_registros, log, arquivos_perfil = processar_csv_com_perfil(filepath)
+                else:
+                    zip_filename, total_registros, log = processar_csv(filepath)
                 flash(f'Processamento concluído! {total_registros} registros processados.')
                 
                 return render_template('resultado.html', 
                                     log=log, 
                                     total_registros=total_registros,
-                                    zip_filename=zip_filename)
+                                    zip_filename=zip_filename,
+                                    arquivos_perfil=arquivos_perfil)
                 
             except Exception as e:
                 flash(f'Erro no processamento: {str(e)}')
@@ -317,7 +737,7 @@ def index():
                 if os.path.exists(filepath):
                     os.remove(filepath)
         else:
-            flash('Por favor, selecione um arquivo CSV')
+            flash('Por favor, selecione um arquivo CSV ou XLSX')
             return redirect(request.url)
     
     return render_template('index.html')
@@ -327,23 +747,120 @@ def download_file(filename):
     try:
         file_path = os.path.join(app.config['DOWNLOAD_FOLDER'], filename)
         
-        # Verificar se o arquivo existe
+        # Modo fluxo: o ZIP é gerado durante o envio e nunca é salvo no servidor
+        if request.args.get('fluxo') == '1' and not os.path.exists(file_path):
+            nome_trabalho = filename[:-len('.zip')] if filename.endswith('.zip') else filename
+            df = obter_trabalho(nome_trabalho)
+            if df is None:
+                flash('Arquivo não encontrado')
+                return redirect(url_for('index'))
+            
+            # O primeiro pedaço é gerado antes de responder: um erro ainda vira flash + redirect
+            # em vez de um 200 com ZIP truncado (os dados já foram validados no envio)
+            fluxo = gerar_zip_em_fluxo(df)
+            primeiro_bloco = next(fluxo)
+            
+            return Response(
+                itertools.chain([primeiro_bloco], fluxo),
+                mimetype='application/zip',
+                headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+            )
+        
+        # Gerar o ZIP na primeira vez que ele for pedido
         if not os.path.exists(file_path):
-            flash('Arquivo não encontrado')
-            return redirect(url_for('index'))
+            nome_trabalho = filename[:-len('.zip')] if filename.endswith('.zip') else filename
+            caminho_dados = localizar_trabalho(nome_trabalho)
+            if caminho_dados is None:
+                flash('Arquivo não encontrado')
+                return redirect(url_for('index'))
+            
+            with trava_do_trabalho(nome_trabalho):
+                if not os.path.exists(file_path):
+                    executar_no_worker(construir_zip, nome_trabalho, caminho_dados,
+                                       app.config['DOWNLOAD_FOLDER'], app.config['WORKSPACE_FOLDER'])
+            
+            # Com o ZIP pronto os dados só voltam à memória se alguém pré-visualizar
+            descartar_da_memoria(nome_trabalho)
+            with trava_trabalhos:
+                TRAVAS_TRABALHOS.pop(nome_trabalho, None)
         
         # Enviar o arquivo para download
         return send_file(
             file_path,
             as_attachment=True,
             download_name=filename,
-            mimetype='application/zip'
+            mimetype='application/zip' if filename.endswith('.zip') else None
         )
     
     except Exception as e:
         flash(f'Erro ao fazer download: {str(e)}')
         return redirect(url_for('index'))
 
+@app.route('/preview/<trabalho>')
+def preview(trabalho):
+    """Pré-visualiza os XMLs de um intervalo de registros ou de um COD_SURVEY"""
+    df = obter_trabalho(trabalho)
+    formato = request.args.get('formato', 'json')
+    
+    if df is None:
+        if formato == 'html':
+            flash('Processamento não encontrado ou expirado. Envie o arquivo novamente.')
+            return redirect(url_for('index'))
+        return jsonify({'erro': 'Processamento não encontrado ou expirado'}), 404
+    
+    total = len(df)
+    cod_survey = request.args.get('cod_survey', '').strip()
+    
+    try:
+        inicio = max(int(request.args.get('inicio', 1)), 1)
+        quantidade = int(request.args.get('quantidade', REGISTROS_POR_PAGINA))
+    except ValueError:
+        if formato == 'html':
+            flash('Os parâmetros inicio e quantidade devem ser números inteiros.')
+            return redirect(url_for('preview', trabalho=trabalho, formato='html'))
+        return jsonify({'erro': 'Parâmetros inicio e quantidade devem ser inteiros'}), 400
+    quantidade = min(max(quantidade, 1), MAX_REGISTROS_POR_PAGINA)
+    
+    if cod_survey:
+        if 'COD_SURVEY' in df.columns:
+            encontrados = (df['COD_SURVEY'].astype(str).str.strip() == cod_survey).to_numpy().nonzero()[0] + 1
+        else:
+            encontrados = []
+        numeros = list(encontrados)[:MAX_REGISTROS_POR_PAGINA]
+    else:
+        numeros = range(inicio, min(inicio + quantidade, total + 1))
+    
+    try:
+        registros = renderizar_registros(df, numeros)
+    except Exception as e:
+        if formato == 'html':
+            flash(f'Erro ao gerar a pré-visualização: {str(e)}')
+            return redirect(url_for('index'))
+        return jsonify({'erro': f'Erro ao gerar a pré-visualização: {str(e)}'}), 500
+    anterior = max(inicio - quantidade, 1) if not cod_survey and inicio > 1 else None
+    proximo = inicio + quantidade if not cod_survey and inicio + quantidade <= total else None
+    
+    if formato == 'html':
+        return render_template('preview.html',
+                            trabalho=trabalho,
+                            registros=registros,
+                            total_registros=total,
+                            cod_survey=cod_survey,
+                            quantidade=quantidade,
+                            anterior=anterior,
+                            proximo=proximo)
+    
+    return jsonify({
+        'trabalho': trabalho,
+        'total_registros': total,
+        'inicio': None if cod_survey else inicio,
+        'quantidade': quantidade,
+        'cod_survey': cod_survey or None,
+        'anterior': anterior,
+        'proximo': proximo,
+        'registros': registros,
+    })
+
 @app.route('/sobre')
 def sobre():
     return render_template('sobre.html')
@@ -371,7 +888,7 @@ def criar_templates():
         <div class="row">
             <div class="col-12 text-center">
                 <h1 class="mb-4">📁 Gerador de XML para Edificações</h1>
-                <p class="lead">Faça upload de um arquivo CSV para gerar arquivos XML</p>
+                <p class="lead">Faça upload de um arquivo CSV ou XLSX para gerar arquivos XML</p>
             </div>
         </div>
 
@@ -380,9 +897,14 @@ def criar_templates():
                 <div class="upload-box rounded-3">
                     <form method="POST" enctype="multipart/form-data">
                         <div class="mb-3">
-                            <label for="file" class="form-label">Selecione o arquivo CSV:</label>
-                            <input class="form-control" type="file" name="file" id="file" accept=".csv" required>
+                            <label for="file" class="form-label">Selecione o arquivo CSV ou XLSX:</label>
+                            <input class="form-control" type="file" name="file" id="file" accept=".csv,.xlsx" required>
+                        </div>
+                        <div class="form-check mb-3 d-inline-block">
+                            <input class="form-check-input" type="checkbox" name="perfil" value="1" id="perfil">
+                            <label class="form-check-label" for="perfil">Gerar perfil de desempenho deste processamento</label>
                         </div>
+                        <br>
                         <button type="submit" class="btn btn-custom btn-lg">
                             📤 Processar Arquivo
                         </button>
@@ -424,6 +946,7 @@ def criar_templates():
                             <li>QUANTIDADE_UMS, UCS_RESIDENCIAIS, UCS_COMERCIAIS</li>
                         </ul>
                         <p><strong>Separador:</strong> Ponto e vírgula (;)</p>
+                        <p><strong>XLSX:</strong> as mesmas colunas na primeira aba, com o cabeçalho na primeira linha</p>
                     </div>
                 </div>
             </div>
@@ -461,12 +984,29 @@ def criar_templates():
                 <a href="{{ url_for('download_file', filename=zip_filename) }}" class="btn btn-primary btn-lg">
                     📥 Download do ZIP
                 </a>
+                <a href="{{ url_for('preview', trabalho=zip_filename[:-4], formato='html') }}" class="btn btn-outline-primary btn-lg ms-2">
+                    🔍 Pré-visualizar XMLs
+                </a>
+                <p class="mt-2">
+                    <a href="{{ url_for('download_file', filename=zip_filename, fluxo=1) }}">Download direto (ZIP gerado durante o envio)</a>
+                </p>
                 <a href="/" class="btn btn-secondary btn-lg ms-2">
                     🔄 Processar Outro Arquivo
                 </a>
             </div>
         </div>
 
+        {% if arquivos_perfil %}
+            <div class="row mt-4">
+                <div class="col-12 text-center">
+                    <p class="mb-1">⏱️ Perfil do processamento:</p>
+                    {% for arquivo in arquivos_perfil %}
+                        <a href="{{ url_for('download_file', filename=arquivo) }}" class="ms-2">{{ arquivo }}</a>
+                    {% endfor %}
+                </div>
+            </div>
+        {% endif %}
+
         <div class="row mt-5">
             <div class="col-12">
                 <div class="card">
@@ -536,15 +1076,89 @@ def criar_templates():
 </body>
 </html>'''
     
-    # Escrever os templates
-    with open(os.path.join(templates_dir, 'index.html'), 'w', encoding='utf-8') as f:
-        f.write(index_html)
+    # Template preview.html
+    preview_html = '''<!DOCTYPE html>
+<html lang="pt-BR">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Pré-visualização dos XMLs</title>
+    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
+</head>
+<body>
+    <div class="container mt-5">
+        <div class="row">
+            <div class="col-12 text-center">
+                <h1>🔍 Pré-visualização dos XMLs</h1>
+                <p class="lead">{{ trabalho }} — {{ total_registros }} registros</p>
+            </div>
+        </div>
+
+        {% with messages = get_flashed_messages() %}
+            {% for message in messages %}
+                <div class="alert alert-info mt-4">{{ message }}</div>
+            {% endfor %}
+        {% endwith %}
+
+        <div class="row mt-4">
+            <div class="col-12">
+                <form method="GET" class="d-flex">
+                    <input type="hidden" name="formato" value="html">
+                    <input class="form-control me-2" type="text" name="cod_survey" value="{{ cod_survey }}" placeholder="Buscar por COD_SURVEY">
+                    <button type="submit" class="btn btn-primary">Buscar</button>
+                </form>
+            </div>
+        </div>
+
+        {% if not registros %}
+            <div class="alert alert-warning mt-4">Nenhum registro encontrado.</div>
+        {% endif %}
+
+        {% for registro in registros %}
+            <div class="card mt-4">
+                <div class="card-header">
+                    <h5>Registro {{ registro.registro }} — {{ registro.arquivo }} ({{ registro.cod_survey }})</h5>
+                </div>
+                <div class="card-body">
+                    <pre style="max-height: 400px; overflow-y: auto;">{{ registro.xml }}</pre>
+                </div>
+            </div>
+        {% endfor %}
+
+        <div class="row mt-4 mb-5">
+            <div class="col-12 text-center">
+                {% if anterior %}
+                    <a href="{{ url_for('preview', trabalho=trabalho, formato='html', inicio=anterior, quantidade=quantidade) }}" class="btn btn-secondary">⬅️ Anteriores</a>
+                {% endif %}
+                {% if proximo %}
+                    <a href="{{ url_for('preview', trabalho=trabalho, formato='html', inicio=proximo, quantidade=quantidade) }}" class="btn btn-secondary ms-2">Próximos ➡️</a>
+                {% endif %}
+                <a href="{{ url_for('download_file', filename=trabalho + '.zip') }}" class="btn btn-primary ms-2">📥 Download do ZIP</a>
+                <a href="/" class="btn btn-outline-secondary ms-2">🔄 Processar Outro Arquivo</a>
+            </div>
+        </div>
+    </div>
+</body>
+</html>'''
     
-    with open(os.path.join(templates_dir, 'resultado.html'), 'w', encoding='utf-8') as f:
-        f.write(resultado_html)
+    # Escrever os templates
+    escrever_template(os.path.join(templates_dir, 'index.html'), index_html)
+    escrever_template(os.path.join(templates_dir, 'resultado.html'), resultado_html)
+    escrever_template(os.path.join(templates_dir, 'sobre.html'), sobre_html)
+    escrever_template(os.path.join(templates_dir, 'preview.html'), preview_html)
+
+def escrever_template(caminho, conteudo):
+    """Escreve o template apenas se ele não existir ou estiver desatualizado"""
+    try:
+        with open(caminho, 'r', encoding='utf-8') as f:
+            if f.read() == conteudo:
+                return False
+    except FileNotFoundError:
+        pass
     
-    with open(os.path.join(templates_dir, 'sobre.html'), 'w', encoding='utf-8') as f:
-        f.write(sobre_html)
+    with open(caminho, 'w', encoding='utf-8') as f:
+        f.write(conteudo)
+    return True
 
 if __name__ == '__main__':
     # Criar diretório de templates se não existir
@@ -552,10 +1166,15 @@ if __name__ == '__main__':
     if not os.path.exists(templates_dir):
         os.makedirs(templates_dir)
     
-    # Criar templates básicos
+    # Criar templates básicos (só regrava os que estiverem desatualizados)
     criar_templates()
     
     # Limpar arquivos antigos ao iniciar
     limpar_arquivos_antigos()
     
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    # Com o reloader do modo debug, só o processo que atende as requisições cria os workers
+    debug = True
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        iniciar_workers()
+    
+    app.run(debug=debug, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -0,0 +1,156 @@
+import argparse
+import csv
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+
+# Comandos de inicialização medidos (processo novo a cada repetição)
+INICIALIZACOES = {
+    'cli (import geradorXml)': 'import geradorXml',
+    'web (import app)': 'import app',
+    'web (import app + criar_templates)': 'import app; app.criar_templates()',
+}
+
+def medir_inicializacao(codigo, repeticoes=5):
+    """Mede o tempo de um interpretador novo executando o código informado"""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        subprocess.run([sys.executable, '-c', codigo], cwd=DIRETORIO, check=True)
+        tempos.append(time.perf_counter() - inicio)
+    return tempos
+
+def benchmark_inicializacao(repeticoes=5):
+    print(f'Inicialização a frio ({repeticoes} repetições, processo novo a cada vez)')
+    base = statistics.median(medir_inicializacao('pass', repeticoes))
+    print(f'  {"python vazio":<40} mediana {base * 1000:8.1f} ms')
+
+    for nome, codigo in INICIALIZACOES.items():
+        tempos = medir_inicializacao(codigo, repeticoes)
+        mediana = statistics.median(tempos)
+        situacao = 'OK' if mediana < 1.0 else 'ACIMA DE 1s'
+        print(f'  {nome:<40} mediana {mediana * 1000:8.1f} ms  máx {max(tempos) * 1000:8.1f} ms  [{situacao}]')
+
+    # Importar não basta: o servidor ainda cria os workers e sobe o Flask antes de atender
+    primeira_pagina, primeiro_envio = medir_servidor(repeticoes)
+    for nome, tempos in (('servidor (até responder /sobre)', primeira_pagina),
+                         ('servidor (até o 1º envio processado)', primeiro_envio)):
+        mediana = statistics.median(tempos)
+        print(f'  {nome:<40} mediana {mediana * 1000:8.1f} ms  máx {max(tempos) * 1000:8.1f} ms')
+
+def medir_servidor(repeticoes=5):
+    """
+    Sobe o servidor como em produção (iniciar_workers + app.run) e mede o tempo
+    até a primeira resposta de /sobre e até o primeiro envio de CSV processado
+    """
+    from carga import CODIGO_SERVIDOR, abridor, corpo_multipart, gerar_csv_sintetico, porta_livre
+
+    corpo, tipo = corpo_multipart('cto_1.csv', gerar_csv_sintetico(1))
+    primeira_pagina, primeiro_envio = [], []
+
+    for _ in range(repeticoes):
+        porta = porta_livre()
+        base_url = f'http://127.0.0.1:{porta}'
+        with tempfile.TemporaryDirectory() as downloads:
+            inicio = time.perf_counter()
+            servidor = subprocess.Popen([sys.executable, '-c', CODIGO_SERVIDOR, str(porta), downloads],
+                                        cwd=DIRETORIO, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            try:
+                while True:
+                    if servidor.poll() is not None:
+                        raise RuntimeError('o servidor encerrou durante a inicialização')
+                    try:
+                        with abridor.open(f'{base_url}/sobre', timeout=5) as resposta:
+                            resposta.read()
+                        break
+                    except (urllib.error.URLError, ConnectionError):
+                        time.sleep(0.01)
+                primeira_pagina.append(time.perf_counter() - inicio)
+
+                requisicao = urllib.request.Request(f'{base_url}/', data=corpo,
+                                                    headers={'Content-Type': tipo}, method='POST')
+                with abridor.open(requisicao, timeout=120) as resposta:
+                    if b'/download/' not in resposta.read():
+                        raise RuntimeError('o primeiro envio não gerou link de download')
+                primeiro_envio.append(time.perf_counter() - inicio)
+            finally:
+                servidor.terminate()
+                servidor.wait()
+
+    return primeira_pagina, primeiro_envio
+
+def gerar_arquivos_sinteticos(diretorio, registros):
+    """Replica as linhas do cto.csv até o total pedido, em CSV (;) e em XLSX"""
+    from openpyxl import Workbook
+
+    with open(os.path.join(DIRETORIO, 'cto.csv'), encoding='latin-1', newline='') as f:
+        leitor = csv.reader(f, delimiter=';')
+        cabecalho = next(leitor)
+        modelo = list(leitor)
+
+    caminho_csv = os.path.join(diretorio, 'sintetico.csv')
+    caminho_xlsx = os.path.join(diretorio, 'sintetico.xlsx')
+
+    planilha = Workbook(write_only=True)
+    aba = planilha.create_sheet()
+    aba.append(cabecalho)
+
+    with open(caminho_csv, 'w', encoding='utf-8', newline='') as f:
+        escritor = csv.writer(f, delimiter=';')
+        escritor.writerow(cabecalho)
+        for i in range(registros):
+            linha = modelo[i % len(modelo)]
+            escritor.writerow(linha)
+            aba.append(linha)
+
+    planilha.save(caminho_xlsx)
+    return caminho_csv, caminho_xlsx
+
+def benchmark_xlsx(registros=5000):
+    import pandas as pd
+    from geradorXml import criar_xml_edificio, iterar_linhas_xlsx
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho_csv, caminho_xlsx = gerar_arquivos_sinteticos(diretorio, registros)
+
+        def leitura_csv():
+            df = pd.read_csv(caminho_csv, sep=';', encoding='utf-8')
+            return (linha for index, linha in df.iterrows())
+
+        def leitura_xlsx():
+            return iterar_linhas_xlsx(caminho_xlsx)
+
+        print(f'Entrada CSV x XLSX ({registros} registros)')
+        for nome, ler in (('csv (pandas)', leitura_csv), ('xlsx (openpyxl read-only)', leitura_xlsx)):
+            inicio = time.perf_counter()
+            total = sum(1 for _ in ler())
+            tempo_leitura = time.perf_counter() - inicio
+
+            inicio = time.perf_counter()
+            for i, linha in enumerate(ler(), 1):
+                criar_xml_edificio(linha, i)
+            tempo_total = time.perf_counter() - inicio
+
+            print(f'  {nome:<28} leitura {total / tempo_leitura:10.0f} reg/s   '
+                  f'leitura + XML {total / tempo_total:8.0f} reg/s')
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks do gerador de XML')
+    parser.add_argument('benchmark', nargs='?', default='inicializacao', choices=['inicializacao', 'xlsx'])
+    parser.add_argument('-n', type=int, help='repetições (inicializacao) ou registros (xlsx)')
+    args = parser.parse_args()
+
+    if args.benchmark == 'xlsx':
+        benchmark_xlsx(args.n or 5000)
+    else:
+        benchmark_inicializacao(args.n or 5)
+
+if __name__ == '__main__':
+    main()
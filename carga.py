@@ -0,0 +1,265 @@
+import argparse
+import math
+import os
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+
+# Servidor de teste: mesmo app.py, sem reloader, com downloads e trabalhos em pasta temporária
+CODIGO_SERVIDOR = '''
+import os
+import signal
+import sys
+import app
+# SIGTERM encerra pelo caminho normal, que também finaliza os workers
+signal.signal(signal.SIGTERM, lambda *args: sys.exit(0))
+app.app.config['DOWNLOAD_FOLDER'] = sys.argv[2]
+app.app.config['TRABALHOS_FOLDER'] = os.path.join(sys.argv[2], 'trabalhos')
+os.makedirs(app.app.config['TRABALHOS_FOLDER'], exist_ok=True)
+app.iniciar_workers()
+app.app.run(host='127.0.0.1', port=int(sys.argv[1]), threaded=True, debug=False)
+'''
+
+PADRAO_DOWNLOAD = re.compile(r'/download/([^"?]+\.zip)')
+
+class SemRedirecionamento(urllib.request.HTTPRedirectHandler):
+    """O app responde erros com flash + redirect; aqui um redirect conta como falha"""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+abridor = urllib.request.build_opener(SemRedirecionamento)
+
+def porta_livre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def gerar_csv_sintetico(registros):
+    """Replica as linhas do cto.csv (mesmo encoding) até o total pedido"""
+    with open(os.path.join(DIRETORIO, 'cto.csv'), 'rb') as f:
+        linhas = f.read().splitlines()
+    cabecalho, modelo = linhas[0], linhas[1:]
+    corpo = [modelo[i % len(modelo)] for i in range(registros)]
+    return b'\r\n'.join([cabecalho] + corpo) + b'\r\n'
+
+def corpo_multipart(nome_arquivo, conteudo):
+    fronteira = uuid.uuid4().hex
+    corpo = (
+        f'--{fronteira}\r\n'
+        f'Content-Disposition: form-data; name="file"; filename="{nome_arquivo}"\r\n'
+        f'Content-Type: text/csv\r\n\r\n'
+    ).encode() + conteudo + f'\r\n--{fronteira}--\r\n'.encode()
+    return corpo, f'multipart/form-data; boundary={fronteira}'
+
+def rss_processo(pid):
+    """RSS em bytes do processo (Linux, /proc)"""
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for linha in f:
+                if linha.startswith('VmRSS:'):
+                    return int(linha.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+def rss_servidor(pid):
+    """RSS do servidor somado ao dos workers (filhos diretos)"""
+    try:
+        import psutil
+        processo = psutil.Process(pid)
+        return processo.memory_info().rss + sum(filho.memory_info().rss for filho in processo.children())
+    except ImportError:
+        pass
+    except Exception:
+        return 0
+
+    total = rss_processo(pid)
+    for entrada in os.listdir('/proc'):
+        if not entrada.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entrada}/stat') as f:
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        if ppid == pid:
+            total += rss_processo(int(entrada))
+    return total
+
+class Medicoes:
+    def __init__(self):
+        self._trava = threading.Lock()
+        self.resultados = []  # (operacao, segundos, ok, detalhe)
+        self.memoria = []  # (segundos desde o início, bytes)
+
+    def registrar(self, operacao, segundos, ok, detalhe=''):
+        with self._trava:
+            self.resultados.append((operacao, segundos, ok, detalhe))
+
+def percentil(valores, p):
+    """Percentil pelo método do posto mais próximo"""
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    posicao = max(math.ceil(p / 100 * len(ordenados)) - 1, 0)
+    return ordenados[min(posicao, len(ordenados) - 1)]
+
+def executar_iteracao(base_url, registros, conteudo, modo_download, medicoes):
+    """Um técnico: envia o CSV e baixa o ZIP gerado"""
+    operacao = f'upload {registros}'
+    corpo, tipo = corpo_multipart(f'cto_{registros}.csv', conteudo)
+    requisicao = urllib.request.Request(f'{base_url}/', data=corpo, headers={'Content-Type': tipo}, method='POST')
+
+    inicio = time.perf_counter()
+    try:
+        with abridor.open(requisicao, timeout=300) as resposta:
+            html = resposta.read().decode('utf-8', 'replace')
+        link = PADRAO_DOWNLOAD.search(html)
+        if not link:
+            raise ValueError('resposta sem link de download')
+        medicoes.registrar(operacao, time.perf_counter() - inicio, True)
+    except Exception as e:
+        medicoes.registrar(operacao, time.perf_counter() - inicio, False, str(e))
+        return
+
+    # Fluxo antes do arquivo: depois que o ZIP existe em disco, ?fluxo=1 apenas o envia
+    modos = ['fluxo', 'arquivo'] if modo_download == 'ambos' else [modo_download]
+    for modo in modos:
+        url = f'{base_url}/download/{link.group(1)}' + ('?fluxo=1' if modo == 'fluxo' else '')
+        operacao = f'download {modo} {registros}'
+        inicio = time.perf_counter()
+        try:
+            with abridor.open(url, timeout=300) as resposta:
+                dados = resposta.read()
+            if not dados.startswith(b'PK'):
+                raise ValueError('resposta não é um ZIP')
+            medicoes.registrar(operacao, time.perf_counter() - inicio, True)
+        except Exception as e:
+            medicoes.registrar(operacao, time.perf_counter() - inicio, False, str(e))
+
+def monitorar_memoria(pid, medicoes, parar, intervalo=0.5):
+    inicio = time.perf_counter()
+    while not parar.is_set():
+        medicoes.memoria.append((time.perf_counter() - inicio, rss_servidor(pid)))
+        parar.wait(intervalo)
+
+def aguardar_servidor(base_url, processo, limite=60):
+    fim = time.time() + limite
+    while time.time() < fim:
+        if processo.poll() is not None:
+            raise RuntimeError('o servidor terminou durante a inicialização')
+        try:
+            with abridor.open(f'{base_url}/sobre', timeout=2):
+                return
+        except (urllib.error.URLError, ConnectionError, OSError):
+            time.sleep(0.2)
+    raise RuntimeError('o servidor não respondeu a tempo')
+
+def relatorio(medicoes, duracao):
+    print(f'\nDuração: {duracao:.1f} s')
+    print(f'{"operação":<26}{"total":>7}{"erros":>7}{"req/s":>8}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}')
+
+    operacoes = sorted({r[0] for r in medicoes.resultados})
+    for operacao in operacoes:
+        dados = [r for r in medicoes.resultados if r[0] == operacao]
+        tempos = [r[1] * 1000 for r in dados if r[2]]
+        erros = sum(1 for r in dados if not r[2])
+        print(f'{operacao:<26}{len(dados):>7}{erros:>7}{len(dados) / duracao:>8.2f}'
+              f'{percentil(tempos, 50):>10.0f}{percentil(tempos, 95):>10.0f}{percentil(tempos, 99):>10.0f}')
+
+    falhas = [r for r in medicoes.resultados if not r[2]]
+    for operacao, segundos, ok, detalhe in falhas[:5]:
+        print(f'  erro em {operacao}: {detalhe}')
+
+    if medicoes.memoria:
+        print('\nRSS do servidor (processo + workers):')
+        passo = max(len(medicoes.memoria) // 10, 1)
+        for segundos, rss in medicoes.memoria[::passo] + [medicoes.memoria[-1]]:
+            print(f'  {segundos:7.1f} s  {rss / 1024 / 1024:8.1f} MB')
+        print(f'  máximo   {max(rss for _, rss in medicoes.memoria) / 1024 / 1024:8.1f} MB')
+
+def main():
+    parser = argparse.ArgumentParser(description='Teste de carga local dos endpoints de upload e download')
+    parser.add_argument('--clientes', type=int, default=30, help='técnicos simultâneos (padrão: 30)')
+    parser.add_argument('--uploads', type=int, default=90, help='total de uploads (padrão: 90)')
+    parser.add_argument('--tamanhos', default='10,100,1000', help='registros por CSV, separados por vírgula')
+    parser.add_argument('--download', choices=['arquivo', 'fluxo', 'ambos'], default='arquivo',
+                        help='modo de download após cada upload (padrão: arquivo)')
+    parser.add_argument('--workers', type=int, help='GERADOR_WORKERS do servidor')
+    parser.add_argument('--max-erros', type=float, default=0.0, help='taxa de erro máxima aceita, 0 a 1 (padrão: 0)')
+    parser.add_argument('--max-p95', type=float, help='p95 máximo aceito em ms, por operação')
+    args = parser.parse_args()
+
+    tamanhos = [int(t) for t in args.tamanhos.split(',')]
+    arquivos = {t: gerar_csv_sintetico(t) for t in tamanhos}
+
+    porta = porta_livre()
+    base_url = f'http://127.0.0.1:{porta}'
+    pasta_downloads = tempfile.mkdtemp(prefix='carga_downloads_')
+    ambiente = dict(os.environ)
+    if args.workers is not None:
+        ambiente['GERADOR_WORKERS'] = str(args.workers)
+
+    servidor = subprocess.Popen(
+        [sys.executable, '-c', CODIGO_SERVIDOR, str(porta), pasta_downloads],
+        cwd=DIRETORIO, env=ambiente, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    medicoes = Medicoes()
+    parar = threading.Event()
+
+    try:
+        aguardar_servidor(base_url, servidor)
+        monitor = threading.Thread(target=monitorar_memoria, args=(servidor.pid, medicoes, parar), daemon=True)
+        monitor.start()
+
+        print(f'{args.uploads} uploads de {tamanhos} registros com {args.clientes} clientes simultâneos em {base_url}')
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.clientes) as executor:
+            for i in range(args.uploads):
+                registros = tamanhos[i % len(tamanhos)]
+                executor.submit(executar_iteracao, base_url, registros, arquivos[registros], args.download, medicoes)
+        duracao = time.perf_counter() - inicio
+
+        parar.set()
+        monitor.join()
+    finally:
+        parar.set()
+        servidor.terminate()
+        try:
+            servidor.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            servidor.kill()
+        shutil.rmtree(pasta_downloads, ignore_errors=True)
+
+    relatorio(medicoes, duracao)
+
+    # Verificação de regressão
+    total = len(medicoes.resultados)
+    erros = sum(1 for r in medicoes.resultados if not r[2])
+    reprovado = total == 0 or erros / total > args.max_erros
+    if args.max_p95 is not None:
+        for operacao in {r[0] for r in medicoes.resultados}:
+            tempos = [r[1] * 1000 for r in medicoes.resultados if r[0] == operacao and r[2]]
+            if percentil(tempos, 95) > args.max_p95:
+                print(f'❌ p95 de {operacao} acima de {args.max_p95:.0f} ms')
+                reprovado = True
+
+    if reprovado:
+        print(f'❌ Reprovado: {erros} erros em {total} requisições')
+        sys.exit(1)
+    print(f'✅ Aprovado: {erros} erros em {total} requisições')
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,6 @@
-import pandas as pd
 import xml.etree.ElementTree as ET
+import argparse
+import itertools
 import os
 import zipfile
 from datetime import datetime
@@ -25,9 +26,19 @@ CODIGOS_COMPLEMENTO = {
     "AM": 121, "NR": 122, "CH": 124
 }
 
+def _isna(valor):
+    """Equivale a pd.isna para um valor escalar (None, NaN, NaT, pd.NA) sem importar o pandas a cada registro"""
+    if valor is None:
+        return True
+    try:
+        return bool(valor != valor)
+    except TypeError:
+        # pd.NA não pode ser convertido para bool
+        return True
+
 def formatar_coordenada(coord):
     """Converte coordenada de formato brasileiro para internacional"""
-    if pd.isna(coord):
+    if _isna(coord):
         return None
     try:
         return float(str(coord).replace(',', '.'))
@@ -38,7 +49,7 @@ def obter_codigo_complemento(texto):
     """
     Obtém o código do complemento baseado nas duas primeiras letras do texto
     """
-    if pd.isna(texto) or texto == '':
+    if _isna(texto) or texto == '':
         return '60'  # Default para LT (LOTE)
     
     texto_str = str(texto).strip().upper()
@@ -60,7 +71,7 @@ def extrair_numero_argumento(texto):
     "QU 26" → "26"
     "BL A" → "A"
     """
-    if pd.isna(texto) or texto == '':
+    if _isna(texto) or texto == '':
         return '1'  # Valor padrão
     
     texto_str = str(texto).strip()
@@ -105,24 +116,24 @@ def criar_xml_edificio(dados_csv, numero_pasta):
     ET.SubElement(edificio, 'coordY').text = str(latitude) 
     
     # Código e nome da zona do CSV
-    codigo_zona = str(dados_csv['COD_ZONA']) if 'COD_ZONA' in dados_csv and not pd.isna(dados_csv['COD_ZONA']) else 'DF-GURX-ETGR-CEOS-68'
+    codigo_zona = str(dados_csv['COD_ZONA']) if 'COD_ZONA' in dados_csv and not _isna(dados_csv['COD_ZONA']) else 'DF-GURX-ETGR-CEOS-68'
     ET.SubElement(edificio, 'codigoZona').text = codigo_zona
     ET.SubElement(edificio, 'nomeZona').text = codigo_zona
     
     # Localidade - usar do CSV
-    localidade = str(dados_csv['LOCALIDADE']) if 'LOCALIDADE' in dados_csv and not pd.isna(dados_csv['LOCALIDADE']) else 'GUARA'
+    localidade = str(dados_csv['LOCALIDADE']) if 'LOCALIDADE' in dados_csv and not _isna(dados_csv['LOCALIDADE']) else 'GUARA'
     ET.SubElement(edificio, 'localidade').text = localidade
     
     # Endereço do edifício
     endereco = ET.SubElement(edificio, 'enderecoEdificio')
-    ET.SubElement(endereco, 'id').text = str(dados_csv['ID_ENDERECO']) if 'ID_ENDERECO' in dados_csv and not pd.isna(dados_csv['ID_ENDERECO']) else '93128133'
+    ET.SubElement(endereco, 'id').text = str(dados_csv['ID_ENDERECO']) if 'ID_ENDERECO' in dados_csv and not _isna(dados_csv['ID_ENDERECO']) else '93128133'
     
     # Logradouro do CSV
     logradouro = str(dados_csv['LOGRADOURO'] +", "+ dados_csv['BAIRRO']+", "+dados_csv['MUNICIPIO']+"- "+dados_csv['LOCALIDADE']+" - "+ dados_csv["UF"]+ f" ({dados_csv['COD_LOGRADOURO']})" )
     ET.SubElement(endereco, 'logradouro').text = logradouro
     
     # Número da fachada do CSV
-    num_fachada = str(dados_csv['NUM_FACHADA']) if 'NUM_FACHADA' in dados_csv and not pd.isna(dados_csv['NUM_FACHADA']) else 'SN'
+    num_fachada = str(dados_csv['NUM_FACHADA']) if 'NUM_FACHADA' in dados_csv and not _isna(dados_csv['NUM_FACHADA']) else 'SN'
     ET.SubElement(endereco, 'numero_fachada').text = num_fachada
     
     # COMPLEMENTO1 - usa coluna COMPLEMENTO
@@ -150,19 +161,19 @@ def criar_xml_edificio(dados_csv, numero_pasta):
     ET.SubElement(endereco, 'argumento3').text = argumento3
     
     # CEP do CSV
-    cep = str(dados_csv['CEP']) if 'CEP' in dados_csv and not pd.isna(dados_csv['CEP']) else '71065071'
+    cep = str(dados_csv['CEP']) if 'CEP' in dados_csv and not _isna(dados_csv['CEP']) else '71065071'
     ET.SubElement(endereco, 'cep').text = cep
     
     # Bairro do CSV
-    bairro = str(dados_csv['BAIRRO']) if 'BAIRRO' in dados_csv and not pd.isna(dados_csv['BAIRRO']) else localidade
+    bairro = str(dados_csv['BAIRRO']) if 'BAIRRO' in dados_csv and not _isna(dados_csv['BAIRRO']) else localidade
     ET.SubElement(endereco, 'bairro').text = bairro
     
     # IDs do roteiro e localidade do CSV
-    ET.SubElement(endereco, 'id_roteiro').text = str(dados_csv['ID_ROTEIRO']) if 'ID_ROTEIRO' in dados_csv and not pd.isna(dados_csv['ID_ROTEIRO']) else '57149008'
-    ET.SubElement(endereco, 'id_localidade').text = str(dados_csv['ID_LOCALIDADE']) if 'ID_LOCALIDADE' in dados_csv and not pd.isna(dados_csv['ID_LOCALIDADE']) else '1894644'
+    ET.SubElement(endereco, 'id_roteiro').text = str(dados_csv['ID_ROTEIRO']) if 'ID_ROTEIRO' in dados_csv and not _isna(dados_csv['ID_ROTEIRO']) else '57149008'
+    ET.SubElement(endereco, 'id_localidade').text = str(dados_csv['ID_LOCALIDADE']) if 'ID_LOCALIDADE' in dados_csv and not _isna(dados_csv['ID_LOCALIDADE']) else '1894644'
     
     # Código do logradouro do CSV
-    cod_lograd = str(dados_csv['COD_LOGRADOURO']) if 'COD_LOGRADOURO' in dados_csv and not pd.isna(dados_csv['COD_LOGRADOURO']) else '2700035341'
+    cod_lograd = str(dados_csv['COD_LOGRADOURO']) if 'COD_LOGRADOURO' in dados_csv and not _isna(dados_csv['COD_LOGRADOURO']) else '2700035341'
     ET.SubElement(endereco, 'cod_lograd').text = cod_lograd
     
     # Técnico
@@ -180,14 +191,14 @@ def criar_xml_edificio(dados_csv, numero_pasta):
     ET.SubElement(edificio, 'data').text = data_atual
     
     # Total de UCs do CSV
-    total_ucs = int(dados_csv['QUANTIDADE_UMS']) if 'QUANTIDADE_UMS' in dados_csv and not pd.isna(dados_csv['QUANTIDADE_UMS']) else 1
+    total_ucs = int(dados_csv['QUANTIDADE_UMS']) if 'QUANTIDADE_UMS' in dados_csv and not _isna(dados_csv['QUANTIDADE_UMS']) else 1
     ET.SubElement(edificio, 'totalUCs').text = str(total_ucs)
     
     # Ocupação e destinação
     ET.SubElement(edificio, 'ocupacao').text = 'EDIFICACAOCOMPLETA'
     
-    ucs_residenciais = int(dados_csv['UCS_RESIDENCIAIS']) if 'UCS_RESIDENCIAIS' in dados_csv and not pd.isna(dados_csv['UCS_RESIDENCIAIS']) else 0
-    ucs_comerciais = int(dados_csv['UCS_COMERCIAIS']) if 'UCS_COMERCIAIS' in dados_csv and not pd.isna(dados_csv['UCS_COMERCIAIS']) else 0
+    ucs_residenciais = int(dados_csv['UCS_RESIDENCIAIS']) if 'UCS_RESIDENCIAIS' in dados_csv and not _isna(dados_csv['UCS_RESIDENCIAIS']) else 0
+    ucs_comerciais = int(dados_csv['UCS_COMERCIAIS']) if 'UCS_COMERCIAIS' in dados_csv and not _isna(dados_csv['UCS_COMERCIAIS']) else 0
     destinacao = determinar_destinacao(ucs_residenciais, ucs_comerciais)
     # Número de pisos
     ET.SubElement(edificio, 'numPisos').text = '1'
@@ -202,43 +213,94 @@ def criar_xml_edificio(dados_csv, numero_pasta):
     
     return xml_completo
 
-def main():
-    # Ler o CSV com tabulação como separador
+def iterar_linhas_xlsx(arquivo):
+    """
+    Lê a primeira aba do .xlsx linha a linha (modo somente leitura do openpyxl),
+    sem carregar a planilha inteira. Cada linha vira um dicionário coluna → valor.
+    """
     try:
-        # Tentar diferentes encodings
-        encodings = ['utf-8', 'latin-1', 'iso-8859-1', 'cp1252']
+        from openpyxl import load_workbook
+    except ImportError:
+        raise Exception("Para ler arquivos .xlsx instale o openpyxl (pip install openpyxl)")
+    
+    planilha = load_workbook(arquivo, read_only=True, data_only=True)
+    try:
+        linhas = planilha.active.iter_rows(values_only=True)
+        cabecalho = next(linhas, None)
+        if cabecalho is None:
+            return
+        colunas = [str(coluna).strip() if coluna is not None else '' for coluna in cabecalho]
         
-        for encoding in encodings:
-            try:
-                df = pd.read_csv('cto.csv', sep=';', encoding=encoding)
-                print(f"Arquivo lido com encoding: {encoding}")
-                break
-            except UnicodeDecodeError:
+        for valores in linhas:
+            # Linhas totalmente vazias (formatação no fim da planilha) são ignoradas
+            if all(valor is None for valor in valores):
                 continue
-        else:
-            print("Tentando ler com encoding padrão...")
-            df = pd.read_csv('cto.csv', sep=';')
+            yield dict(zip(colunas, valores))
+    finally:
+        planilha.close()
+
+def processar_arquivo(arquivo):
+    """Gera as pastas, os XMLs e o ZIP; retorna o nome do ZIP ou None em caso de erro"""
+    if arquivo.lower().endswith('.xlsx'):
+        # XLSX: as linhas são lidas e processadas uma a uma
+        try:
+            linhas = iterar_linhas_xlsx(arquivo)
+            primeira = next(linhas, None)
+        except Exception as e:
+            print(f"Erro ao ler o arquivo XLSX: {e}")
+            return
+        
+        if primeira is None:
+            print("O arquivo XLSX está vazio")
+            return
+        
+        print(f"Colunas disponíveis: {list(primeira.keys())}")
+        estacao = primeira['ESTACAO_ABASTECEDORA']
+        linhas = itertools.chain([primeira], linhas)
+    else:
+        # pandas só é importado quando há trabalho a fazer, mantendo a inicialização rápida
+        import pandas as pd
+        
+        # Ler o CSV com tabulação como separador
+        try:
+            # Tentar diferentes encodings
+            encodings = ['utf-8', 'latin-1', 'iso-8859-1', 'cp1252']
             
-    except Exception as e:
-        print(f"Erro ao ler o arquivo CSV: {e}")
-        print("Verifique se o arquivo existe e o separador está correto.")
-        return
-    
-    # Mostrar informações do arquivo
-    print(f"Total de linhas: {len(df)}")
-    print(f"Colunas disponíveis: {list(df.columns)}")
+            for encoding in encodings:
+                try:
+                    df = pd.read_csv(arquivo, sep=';', encoding=encoding)
+                    print(f"Arquivo lido com encoding: {encoding}")
+                    break
+                except UnicodeDecodeError:
+                    continue
+            else:
+                print("Tentando ler com encoding padrão...")
+                df = pd.read_csv(arquivo, sep=';')
+                
+        except Exception as e:
+            print(f"Erro ao ler o arquivo CSV: {e}")
+            print("Verifique se o arquivo existe e o separador está correto.")
+            return
+        
+        # Mostrar informações do arquivo
+        print(f"Total de linhas: {len(df)}")
+        print(f"Colunas disponíveis: {list(df.columns)}")
+        estacao = df['ESTACAO_ABASTECEDORA'].iloc[0]
+        linhas = (linha for index, linha in df.iterrows())
     
     # Criar diretório principal
-    diretorio_principal = 'moradias_xml_'+ df['ESTACAO_ABASTECEDORA'].iloc[0]+ "_" + datetime.now().strftime('%Y%m%d%H%M%S')
+    diretorio_principal = 'moradias_xml_'+ str(estacao) + "_" + datetime.now().strftime('%Y%m%d%H%M%S')
     os.makedirs(diretorio_principal, exist_ok=True)
     
     # Lista para armazenar caminhos das pastas
     pastas_criadas = []
     
-    print("\nProcessando CSV e gerando XMLs...")
+    print("\nProcessando arquivo e gerando XMLs...")
     
-    # Processar cada linha do CSV
-    for i, (index, linha) in enumerate(df.iterrows(), 1):
+    # Processar cada linha do arquivo
+    total = 0
+    for i, linha in enumerate(linhas, 1):
+        total = i
         # Criar nome da pasta
         nome_pasta = f'moradia{i}'
         caminho_pasta = os.path.join(diretorio_principal, nome_pasta)
@@ -289,8 +351,29 @@ def main():
                     zipf.write(file_path, arcname)
     
     print(f'\n✅ Arquivo ZIP criado: {zip_filename}')
-    print(f'✅ Total de {len(df)} pastas e arquivos XML criados.')
-    input("Pressione Enter para sair...")
+    print(f'✅ Total de {total} pastas e arquivos XML criados.')
+    return zip_filename
+
+def main():
+    parser = argparse.ArgumentParser(description='Gera os XMLs de edificações a partir do CSV ou XLSX de CTOs')
+    parser.add_argument('arquivo', nargs='?', default='cto.csv', help='arquivo .csv (separado por ;) ou .xlsx (padrão: cto.csv)')
+    parser.add_argument('--perfil', action='store_true', help='gera o perfil de desempenho (.pstats, .folded e .txt) ao lado do ZIP')
+    args = parser.parse_args()
+    
+    if args.perfil:
+        from perfil import Perfilador
+        
+        with Perfilador() as perfilador:
+            zip_filename = processar_arquivo(args.arquivo)
+        
+        if zip_filename:
+            for caminho in perfilador.salvar(zip_filename[:-len('.zip')]):
+                print(f'✅ Perfil salvo: {caminho}')
+    else:
+        zip_filename = processar_arquivo(args.arquivo)
+    
+    if zip_filename:
+        input("Pressione Enter para sair...")
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
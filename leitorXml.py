@@ -0,0 +1,355 @@
+import argparse
+import csv
+import os
+import re
+import struct
+import sys
+import zlib
+import xml.etree.ElementTree as ET
+
+from geradorXml import CODIGOS_COMPLEMENTO
+
+# Assinaturas dos blocos do formato ZIP
+ASSINATURA_ARQUIVO = b'PK\x03\x04'
+ASSINATURA_DESCRITOR = b'PK\x07\x08'
+ASSINATURAS_FINAIS = (b'PK\x01\x02', b'PK\x05\x06', b'PK\x06\x06', b'PK\x06\x07')
+
+TAMANHO_BLOCO = 64 * 1024
+# Sem tamanho no cabeçalho o fim da entrada só é conhecido pelo deflate: blocos menores
+# evitam ler (e devolver) muito além de cada XML, que tem poucas centenas de bytes
+TAMANHO_BLOCO_SEM_TAMANHO = 4 * 1024
+REGISTROS_POR_LOTE_PARQUET = 10000
+
+# Colunas com os mesmos nomes lidos por criar_xml_edificio
+COLUNAS = [
+    'ESTACAO_ABASTECEDORA', 'COD_SURVEY', 'LATITUDE', 'LONGITUDE', 'COD_ZONA',
+    'LOCALIDADE', 'ID_ENDERECO', 'LOGRADOURO', 'BAIRRO', 'MUNICIPIO', 'UF',
+    'COD_LOGRADOURO', 'NUM_FACHADA', 'COMPLEMENTO', 'COMPLEMENTO2', 'RESULTADO',
+    'CEP', 'ID_ROTEIRO', 'ID_LOCALIDADE', 'QUANTIDADE_UMS', 'ARQUIVO_XML'
+]
+
+# Códigos e argumentos exatamente como estão no XML (opção --complementos-brutos)
+COLUNAS_COMPLEMENTO_BRUTO = [
+    'ID_COMPLEMENTO1', 'ARGUMENTO1', 'ID_COMPLEMENTO2', 'ARGUMENTO2', 'ID_COMPLEMENTO3', 'ARGUMENTO3'
+]
+
+# Caminho do elemento no XML → coluna do CSV
+CAMPOS_XML = {
+    'edificio/nEdificio': 'COD_SURVEY',
+    'edificio/coordX': 'LONGITUDE',
+    'edificio/coordY': 'LATITUDE',
+    'edificio/codigoZona': 'COD_ZONA',
+    'edificio/localidade': 'LOCALIDADE',
+    'edificio/enderecoEdificio/id': 'ID_ENDERECO',
+    'edificio/enderecoEdificio/numero_fachada': 'NUM_FACHADA',
+    'edificio/enderecoEdificio/cep': 'CEP',
+    'edificio/enderecoEdificio/bairro': 'BAIRRO',
+    'edificio/enderecoEdificio/id_roteiro': 'ID_ROTEIRO',
+    'edificio/enderecoEdificio/id_localidade': 'ID_LOCALIDADE',
+    'edificio/enderecoEdificio/cod_lograd': 'COD_LOGRADOURO',
+    'edificio/totalUCs': 'QUANTIDADE_UMS',
+}
+
+# id_complementoN/argumentoN → coluna de origem
+COLUNAS_COMPLEMENTO = {'1': 'COMPLEMENTO', '2': 'COMPLEMENTO2', '3': 'RESULTADO'}
+
+# Código numérico → sigla (inverso de CODIGOS_COMPLEMENTO)
+SIGLAS_COMPLEMENTO = {str(codigo): sigla for sigla, codigo in CODIGOS_COMPLEMENTO.items()}
+
+# "LOGRADOURO, BAIRRO, MUNICIPIO, LOCALIDADE - UF (COD)" (app.py usa ", " e geradorXml.py "- " antes da localidade)
+PADRAO_LOGRADOURO = re.compile(
+    r'^(?P<LOGRADOURO>.*?), (?P<BAIRRO>.*?), (?P<MUNICIPIO>.*?)(?:, |- )(?P<LOCALIDADE>.*) - (?P<UF>[^ ]*) \((?P<COD_LOGRADOURO>[^)]*)\)$'
+)
+
+PADRAO_ESTACAO = re.compile(r'moradias_xml_(?P<estacao>.+)_\d{14}(?:_[0-9a-f]{8})?')
+
+class LeitorFluxo:
+    """Leitura sequencial com devolução de bytes, sem precisar de seek"""
+
+    def __init__(self, arquivo):
+        self._arquivo = arquivo
+        self._pendente = b''
+        self._posicao = 0
+
+    def ler(self, tamanho):
+        """Lê até `tamanho` bytes; devolve menos apenas no fim do arquivo"""
+        dados = self._pendente[self._posicao:self._posicao + tamanho]
+        self._posicao += len(dados)
+        while len(dados) < tamanho:
+            mais = self._arquivo.read(tamanho - len(dados))
+            if not mais:
+                break
+            dados += mais
+        return dados
+
+    def ler_exato(self, tamanho):
+        dados = self.ler(tamanho)
+        if len(dados) < tamanho:
+            raise ValueError('Arquivo ZIP truncado')
+        return dados
+
+    def devolver(self, dados):
+        self._pendente = dados + self._pendente[self._posicao:]
+        self._posicao = 0
+
+def _tamanhos_zip64(extra, tamanho_comprimido, tamanho_original):
+    """Lê os tamanhos reais do campo extra ZIP64 quando o cabeçalho traz 0xFFFFFFFF"""
+    posicao = 0
+    while posicao + 4 <= len(extra):
+        tipo, tamanho = struct.unpack('<HH', extra[posicao:posicao + 4])
+        if tipo == 0x0001:
+            valores = extra[posicao + 4:posicao + 4 + tamanho]
+            campos = iter(struct.unpack(f'<{len(valores) // 8}Q', valores[:len(valores) // 8 * 8]))
+            if tamanho_original == 0xFFFFFFFF:
+                tamanho_original = next(campos)
+            if tamanho_comprimido == 0xFFFFFFFF:
+                tamanho_comprimido = next(campos)
+            break
+        posicao += 4 + tamanho
+    return tamanho_comprimido, tamanho_original
+
+def _ler_descritor(leitor):
+    """Descarta o descritor de dados (assinatura opcional, CRC e tamanhos de 4 ou 8 bytes)"""
+    inicio = leitor.ler_exato(4)
+    if inicio == ASSINATURA_DESCRITOR:
+        leitor.ler_exato(4)
+    leitor.ler_exato(8)
+
+    # Tamanhos ZIP64 ocupam mais 8 bytes; confere se o próximo bloco começa onde deveria
+    proximo = leitor.ler(4)
+    if proximo and proximo != ASSINATURA_ARQUIVO and proximo not in ASSINATURAS_FINAIS:
+        proximo = leitor.ler(8)[4:]
+        if proximo != ASSINATURA_ARQUIVO and proximo not in ASSINATURAS_FINAIS:
+            raise ValueError('Descritor de dados inválido no arquivo ZIP')
+    leitor.devolver(proximo)
+
+def _blocos_entrada(leitor, metodo, tamanho_comprimido, usa_descritor):
+    """Devolve o conteúdo descomprimido de uma entrada em blocos"""
+    tamanho_conhecido = not usa_descritor or tamanho_comprimido > 0
+
+    if metodo == 0:
+        if not tamanho_conhecido:
+            raise ValueError('Entrada sem compressão e sem tamanho no cabeçalho não pode ser lida em fluxo')
+        faltando = tamanho_comprimido
+        while faltando > 0:
+            dados = leitor.ler_exato(min(faltando, TAMANHO_BLOCO))
+            faltando -= len(dados)
+            yield dados
+    elif metodo == 8:
+        descompressor = zlib.decompressobj(-15)
+        faltando = tamanho_comprimido if tamanho_conhecido else None
+        while not descompressor.eof:
+            tamanho = TAMANHO_BLOCO_SEM_TAMANHO if faltando is None else min(faltando, TAMANHO_BLOCO)
+            if tamanho == 0:
+                break
+            dados = leitor.ler(tamanho)
+            if not dados:
+                raise ValueError('Arquivo ZIP truncado')
+            if faltando is not None:
+                faltando -= len(dados)
+            saida = descompressor.decompress(dados)
+            if saida:
+                yield saida
+        # O deflate termina sozinho: o que sobrou do bloco pertence à próxima estrutura
+        if descompressor.unused_data:
+            leitor.devolver(descompressor.unused_data)
+        saida = descompressor.flush()
+        if saida:
+            yield saida
+    else:
+        raise ValueError(f'Método de compressão não suportado: {metodo}')
+
+    if usa_descritor:
+        _ler_descritor(leitor)
+
+def iterar_entradas_zip(arquivo):
+    """
+    Percorre o ZIP pelos cabeçalhos locais, na ordem em que estão gravados,
+    sem carregar o diretório central. Devolve (nome, blocos) para cada entrada.
+    """
+    leitor = LeitorFluxo(arquivo)
+
+    while True:
+        assinatura = leitor.ler(4)
+        if len(assinatura) < 4 or assinatura in ASSINATURAS_FINAIS:
+            return
+        if assinatura != ASSINATURA_ARQUIVO:
+            raise ValueError('Arquivo não é um ZIP válido')
+
+        (versao, flags, metodo, hora, data, crc, tamanho_comprimido, tamanho_original,
+         tamanho_nome, tamanho_extra) = struct.unpack('<5H3L2H', leitor.ler_exato(26))
+        nome = leitor.ler_exato(tamanho_nome).decode('utf-8' if flags & 0x800 else 'cp437')
+        extra = leitor.ler_exato(tamanho_extra)
+
+        if flags & 0x1:
+            raise ValueError(f'Entrada criptografada não suportada: {nome}')
+        if 0xFFFFFFFF in (tamanho_comprimido, tamanho_original):
+            tamanho_comprimido, tamanho_original = _tamanhos_zip64(extra, tamanho_comprimido, tamanho_original)
+
+        blocos = _blocos_entrada(leitor, metodo, tamanho_comprimido, flags & 0x08)
+        yield nome, blocos
+
+        # Se quem consumiu não leu tudo, descarta o restante para chegar à próxima entrada
+        for _ in blocos:
+            pass
+
+def formatar_complemento(codigo, argumento):
+    """
+    Reconstrói o texto do complemento (ex.: 60 + "73" → "LT 73").
+    A reconstrução tem perdas, porque o gerador já normalizou o valor original.
+    Um complemento vazio foi gravado como 60/"1" e volta como "LT 1". Siglas
+    desconhecidas também viram "LT". O espaçamento é padronizado ("SL1" → "SL 1").
+    Para conciliar com o CSV de origem, use as colunas de --complementos-brutos.
+    """
+    sigla = SIGLAS_COMPLEMENTO.get(codigo, '')
+    return f'{sigla} {argumento}'.strip()
+
+def ler_registro_xml(blocos):
+    """Lê um moradiaN.xml de forma incremental e devolve as colunas do CSV"""
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    caminho = []
+    registro = {}
+    codigos = {}
+    argumentos = {}
+
+    for bloco in blocos:
+        parser.feed(bloco)
+        for evento, elemento in parser.read_events():
+            if evento == 'start':
+                caminho.append(elemento.tag)
+                continue
+
+            chave = '/'.join(caminho)
+            texto = (elemento.text or '').strip()
+            caminho.pop()
+
+            if chave in CAMPOS_XML:
+                registro[CAMPOS_XML[chave]] = texto
+            elif chave == 'edificio/enderecoEdificio/logradouro':
+                registro['LOGRADOURO'] = texto
+            elif chave.startswith('edificio/enderecoEdificio/id_complemento'):
+                codigos[chave[-1]] = texto
+            elif chave.startswith('edificio/enderecoEdificio/argumento'):
+                argumentos[chave[-1]] = texto
+
+            elemento.clear()
+    parser.close()
+
+    # Separar o logradouro composto nas colunas de origem
+    logradouro = PADRAO_LOGRADOURO.match(registro.get('LOGRADOURO', ''))
+    if logradouro:
+        registro['LOGRADOURO'] = logradouro.group('LOGRADOURO')
+        registro['MUNICIPIO'] = logradouro.group('MUNICIPIO')
+        registro['UF'] = logradouro.group('UF')
+        registro.setdefault('BAIRRO', logradouro.group('BAIRRO'))
+        registro.setdefault('LOCALIDADE', logradouro.group('LOCALIDADE'))
+        registro.setdefault('COD_LOGRADOURO', logradouro.group('COD_LOGRADOURO'))
+
+    for numero, coluna in COLUNAS_COMPLEMENTO.items():
+        if numero in codigos:
+            registro[coluna] = formatar_complemento(codigos[numero], argumentos.get(numero, ''))
+        registro[f'ID_COMPLEMENTO{numero}'] = codigos.get(numero, '')
+        registro[f'ARGUMENTO{numero}'] = argumentos.get(numero, '')
+
+    # Coordenadas no formato brasileiro, como no CSV original
+    for coluna in ('LATITUDE', 'LONGITUDE'):
+        valor = registro.get(coluna, '')
+        registro[coluna] = '' if valor == 'None' else valor.replace('.', ',')
+
+    return registro
+
+def iterar_registros(arquivo, estacao=''):
+    """Percorre os moradiaN.xml do ZIP e devolve um registro por arquivo"""
+    for nome, blocos in iterar_entradas_zip(arquivo):
+        if not nome.lower().endswith('.xml'):
+            continue
+        registro = ler_registro_xml(blocos)
+        registro['ESTACAO_ABASTECEDORA'] = estacao
+        registro['ARQUIVO_XML'] = nome
+        yield registro
+
+def gravar_csv(registros, destino, colunas=COLUNAS):
+    total = 0
+    with open(destino, 'w', newline='', encoding='utf-8') as f:
+        escritor = csv.DictWriter(f, fieldnames=colunas, delimiter=';', extrasaction='ignore')
+        escritor.writeheader()
+        for registro in registros:
+            escritor.writerow(registro)
+            total += 1
+    return total
+
+def gravar_parquet(registros, destino, colunas=COLUNAS):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise Exception("Para gerar Parquet instale o pyarrow (pip install pyarrow)")
+
+    esquema = pa.schema([(coluna, pa.string()) for coluna in colunas])
+    total = 0
+    lote = []
+
+    with pq.ParquetWriter(destino, esquema) as escritor:
+        for registro in registros:
+            lote.append({coluna: registro.get(coluna) for coluna in colunas})
+            if len(lote) >= REGISTROS_POR_LOTE_PARQUET:
+                escritor.write_table(pa.Table.from_pylist(lote, schema=esquema))
+                total += len(lote)
+                lote = []
+        if lote:
+            escritor.write_table(pa.Table.from_pylist(lote, schema=esquema))
+            total += len(lote)
+
+    return total
+
+def converter_zip(origem, destino, complementos_brutos=False):
+    """
+    Converte um moradias_xml_*.zip (caminho ou '-' para a entrada padrão) em CSV ou Parquet.
+    Com complementos_brutos, acrescenta os códigos e argumentos de complemento sem reconstrução.
+    """
+    colunas = COLUNAS + COLUNAS_COMPLEMENTO_BRUTO if complementos_brutos else COLUNAS
+    nome_base = os.path.basename(origem)
+    estacao = PADRAO_ESTACAO.match(nome_base)
+    estacao = estacao.group('estacao') if estacao else ''
+
+    if origem == '-':
+        arquivo = sys.stdin.buffer
+    else:
+        arquivo = open(origem, 'rb', buffering=TAMANHO_BLOCO)
+
+    try:
+        registros = iterar_registros(arquivo, estacao)
+        if destino.lower().endswith('.parquet'):
+            return gravar_parquet(registros, destino, colunas)
+        return gravar_csv(registros, destino, colunas)
+    finally:
+        if arquivo is not sys.stdin.buffer:
+            arquivo.close()
+
+def main():
+    parser = argparse.ArgumentParser(description='Converte um ZIP moradias_xml de volta para CSV ou Parquet')
+    parser.add_argument('origem', help="moradias_xml_XXX.zip ou '-' para ler da entrada padrão")
+    parser.add_argument('destino', nargs='?', help='saida.csv ou saida.parquet (padrão: nome do ZIP com .csv)')
+    parser.add_argument('--complementos-brutos', action='store_true',
+                        help='acrescenta ID_COMPLEMENTOn/ARGUMENTOn como estão no XML (COMPLEMENTO, '
+                             'COMPLEMENTO2 e RESULTADO são reconstruídos com perdas)')
+    args = parser.parse_args()
+
+    origem = args.origem
+    if args.destino:
+        destino = args.destino
+    elif origem == '-':
+        destino = 'moradias.csv'
+    else:
+        destino = os.path.splitext(os.path.basename(origem))[0] + '.csv'
+
+    try:
+        total = converter_zip(origem, destino, args.complementos_brutos)
+    except Exception as e:
+        print(f"Erro ao ler o arquivo ZIP: {e}")
+        sys.exit(1)
+
+    print(f'✅ {total} registros exportados para: {destino}')
+
+if __name__ == '__main__':
+    main()
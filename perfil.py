@@ -0,0 +1,84 @@
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+from collections import Counter
+
+# Funções destacadas no resumo de cada perfil
+FUNCOES_RESUMO = r'criar_xml_edificio|obter_codigo_complemento|read_csv|zipfile'
+INTERVALO_AMOSTRAGEM = 0.005  # segundos entre amostras da pilha
+
+def _nome_frame(frame):
+    codigo = frame.f_code
+    return f'{codigo.co_name} ({os.path.basename(codigo.co_filename)}:{codigo.co_firstlineno})'
+
+class Perfilador:
+    """
+    Perfila um único trabalho: cProfile (tempos exatos por função) e, em paralelo,
+    amostragem da pilha da thread do trabalho para gerar o arquivo de flame graph.
+    Só deve ser usado quando o perfil for pedido; fora dele não há custo algum.
+    No Python 3.12+ o cProfile vale para o processo inteiro (todas as threads, um por vez):
+    quem perfila um trabalho deve rodá-lo em um processo que não faça mais nada ao mesmo tempo.
+    """
+
+    def __init__(self, intervalo=INTERVALO_AMOSTRAGEM):
+        self.intervalo = intervalo
+        self._perfil = cProfile.Profile()
+        self._pilhas = Counter()
+        self._parar = threading.Event()
+        self._amostrador = None
+        self._thread_id = None
+
+    def __enter__(self):
+        try:
+            self._perfil.enable()
+        except ValueError as e:
+            # Outro perfil ou ferramenta de depuração já está ativo neste processo
+            raise Exception(f"Não foi possível iniciar o perfil: {e}")
+
+        self._thread_id = threading.get_ident()
+        self._amostrador = threading.Thread(target=self._amostrar, daemon=True)
+        self._amostrador.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._perfil.disable()
+        self._parar.set()
+        self._amostrador.join()
+        return False
+
+    def _amostrar(self):
+        while not self._parar.wait(self.intervalo):
+            frame = sys._current_frames().get(self._thread_id)
+            pilha = []
+            while frame is not None:
+                pilha.append(_nome_frame(frame))
+                frame = frame.f_back
+            if pilha:
+                self._pilhas[';'.join(reversed(pilha))] += 1
+
+    def salvar(self, caminho_base):
+        """Grava <base>.pstats, <base>.folded (pilhas colapsadas) e <base>.txt (resumo)"""
+        caminho_pstats = f'{caminho_base}.pstats'
+        caminho_folded = f'{caminho_base}.folded'
+        caminho_resumo = f'{caminho_base}.txt'
+
+        self._perfil.dump_stats(caminho_pstats)
+
+        with open(caminho_folded, 'w', encoding='utf-8') as f:
+            for pilha, amostras in self._pilhas.most_common():
+                f.write(f'{pilha} {amostras}\n')
+
+        resumo = io.StringIO()
+        estatisticas = pstats.Stats(self._perfil, stream=resumo)
+        resumo.write('Funções do gerador (tempo acumulado)\n')
+        estatisticas.sort_stats('cumulative').print_stats(FUNCOES_RESUMO)
+        resumo.write('\nFunções mais caras (tempo próprio)\n')
+        estatisticas.sort_stats('tottime').print_stats(30)
+
+        with open(caminho_resumo, 'w', encoding='utf-8') as f:
+            f.write(resumo.getvalue())
+
+        return [caminho_pstats, caminho_folded, caminho_resumo]